@@ -1,132 +1,493 @@
+import functools
+import gzip
+import itertools
 import pickle
-from datetime import datetime
+import re
+from bisect import bisect_right
+from datetime import date, datetime
 from collections import UserDict
+from copy import deepcopy
+from types import MappingProxyType
 
 
+_PHONE_RE = re.compile(r'^\d{10}\Z').match
+
+
+def _next_birthday(year, month, day):
+    # Feb 29 outside a leap year is celebrated on Mar 1.
+    try:
+        return date(year, month, day).toordinal()
+    except ValueError:
+        return date(year, 3, 1).toordinal()
+
+
+@functools.lru_cache(maxsize=512)
+def _days_until(today_ord, month, day):
+    year = date.fromordinal(today_ord).year
+    next_ord = _next_birthday(year, month, day)
+    if next_ord < today_ord:
+        next_ord = _next_birthday(year + 1, month, day)
+    return next_ord - today_ord
+
+
+# numpy and numba are optional and only needed by upcoming_birthdays, so they
+# are imported on first use to keep them out of the interactive startup path.
+@functools.cache
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+@functools.cache
+def _birthday_kernel():
+    try:
+        import numba
+    except ImportError:
+        return None
+    # Address books are far too small for parallel=True to pay for its thread pool.
+    return numba.njit(cache=True)(_days_to_birthday_batch)
+
+
+def _days_to_birthday_batch(month, day, today_ord, starts, next_starts, result):
+    for i in range(month.shape[0]):
+        days = starts[month[i]] + day[i] - 1 - today_ord
+        if days < 0:
+            days = next_starts[month[i]] + day[i] - 1 - today_ord
+        result[i] = days
+
+
+def _month_starts(year):
+    # Indexed by month number; Feb 29 past the end of a short February lands on Mar 1.
+    return _numpy().array([0] + [date(year, month, 1).toordinal() for month in range(1, 13)])
+
+
+def _days_until_batch(months, days, today_ord):
+    np = _numpy()
+    year = date.fromordinal(today_ord).year
+    starts, next_starts = _month_starts(year), _month_starts(year + 1)
+    kernel = _birthday_kernel()
+    if kernel is not None:
+        result = np.empty(months.shape[0], dtype=np.int64)
+        kernel(months, days, today_ord, starts, next_starts, result)
+        return result
+    result = starts[months] + days - 1 - today_ord
+    passed = result < 0
+    result[passed] = next_starts[months[passed]] + days[passed] - 1 - today_ord
+    return result
+
+
+def _slot_state(state):
+    # Files written before __slots__ carry a plain __dict__ state.
+    if isinstance(state, tuple):
+        return state[1]
+    return state
+
 
 class Field:
-    def __init__(self, value):
-        self.__value = value
+    __slots__ = ('value',)
 
-    @property
-    def value(self):
-        return self.__value
+    def __init__(self, value):
+        # Bypasses the immutability guard on Phone and Birthday.
+        object.__setattr__(self, 'value', value)
 
-    @value.setter
-    def value(self, new_value):
-        self.__value = new_value
+    def __setstate__(self, state):
+        state = _slot_state(state)
+        # Older files kept the value behind a name-mangled property.
+        Field.__init__(self, state.get('value', state.get('_Field__value')))
 
     def __str__(self):
-        return str(self.__value)
+        return str(self.value)
 
 
 class Name(Field):
-    pass
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        # The book indexes records by name, so rename through Record.name instead.
+        raise AttributeError("Name is immutable; assign a new name to the record instead.")
+
+    def __delattr__(self, name):
+        raise AttributeError("Name is immutable; assign a new name to the record instead.")
 
 
 class Phone(Field):
+    __slots__ = ()
+
     def __init__(self, value):
         self.validate_phone(value)
         super().__init__(value)
 
+    @classmethod
+    def _trusted(cls, value):
+        # Numbers read back from our own file were validated when first added.
+        phone = cls.__new__(cls)
+        Field.__init__(phone, value)
+        return phone
+
     def validate_phone(self, value):
-        if not isinstance(value, str) or len(value) != 10 or not value.isdigit():
+        if not isinstance(value, str) or not _PHONE_RE(value):
             raise ValueError("Phone number must contain exactly 10 digits.")
 
-    @Field.value.setter
-    def value(self, new_value):
-        self.validate_phone(new_value)
-        super().value(new_value)
+    def __setattr__(self, name, value):
+        # Record.phones is keyed by the number, so replace the Phone instead.
+        raise AttributeError("Phone is immutable; create a new Phone instead.")
+
+    def __delattr__(self, name):
+        raise AttributeError("Phone is immutable; create a new Phone instead.")
 
 
 class Birthday(Field):
+    __slots__ = ()
+
     def __init__(self, value=None):
         self.validate_date(value)
-        super().__init__(value)
+        super().__init__(self.to_date(value))
 
     def validate_date(self, value):
-        if value is not None and not isinstance(value, datetime):
-            raise ValueError("Birthday must be a datetime object.")
+        if value is not None and not isinstance(value, (date, str)):
+            raise ValueError("Birthday must be a date, a datetime or a YYYY-MM-DD string.")
+
+    @staticmethod
+    def to_date(value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, str):
+            return date.fromisoformat(value)
+        return value
 
-    @Field.value.setter
-    def value(self, new_value):
-        self.validate_date(new_value)
-        super().value(new_value)
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        Field.__init__(self, self.to_date(self.value))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Birthday is immutable; assign a new birthday to the record instead.")
+
+    def __delattr__(self, name):
+        raise AttributeError("Birthday is immutable; assign a new birthday to the record instead.")
+
+    def isoformat(self):
+        if self.value is None:
+            return None
+        return self.value.isoformat()
+
+    def days_to_birthday(self):
+        if self.value is None:
+            return None
+        return _days_until(date.today().toordinal(), self.value.month, self.value.day)
 
 
 class Record:
+    __slots__ = ('_name', '_name_lc', '_phones', '_birthday', 'book')
+
     def __init__(self, name, birthday=None):
-        self.name = Name(name)
-        self.phones = []
-        self.birthday = Birthday(birthday)
+        self.book = None
+        self._phones = {}
+        self.name = name
+        self.birthday = birthday
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        if not isinstance(name, Name):
+            name = Name(name)
+        book = self.book
+        if book is not None:
+            book._detach(self)
+        self._name = name
+        self._name_lc = name.value.lower()
+        if book is not None:
+            book.add_record(self)
+
+    @property
+    def phones(self):
+        # Read-only view; add_phone/remove_phone/edit_phone keep the book's index in step.
+        return MappingProxyType(self._phones)
+
+    @property
+    def birthday(self):
+        return self._birthday
+
+    @birthday.setter
+    def birthday(self, birthday):
+        if not isinstance(birthday, Birthday):
+            birthday = Birthday(birthday)
+        self._birthday = birthday
+        if self.book is not None:
+            self.book._invalidate()
+
+    @classmethod
+    def _trusted(cls, name, phones, birthday):
+        record = cls(name, birthday)
+        record._phones = {phone: Phone._trusted(phone) for phone in phones}
+        return record
 
     def add_phone(self, phone):
-        self.phones.append(Phone(phone))
+        self._phones[phone] = Phone(phone)
+        if self.book is not None:
+            self.book._index_phone(phone, self)
 
     def remove_phone(self, phone):
-        self.phones = [p for p in self.phones if str(p) != str(phone)]
+        phone = str(phone)
+        if self._phones.pop(phone, None) is not None and self.book is not None:
+            self.book._unindex_phone(phone, self)
 
     def edit_phone(self, old_phone, new_phone):
-        if not self.find_phone(old_phone):
+        old_phone = str(old_phone)
+        if old_phone not in self._phones:
             raise ValueError("Old phone number not found.")
-        self.remove_phone(old_phone)
-        self.add_phone(new_phone)
+        phone = Phone(new_phone)
+        del self._phones[old_phone]
+        self._phones[new_phone] = phone
+        if self.book is not None:
+            self.book._unindex_phone(old_phone, self)
+            self.book._index_phone(new_phone, self)
 
     def find_phone(self, phone):
-        return next((p for p in self.phones if str(p) == str(phone)), None)
+        return self._phones.get(str(phone))
 
     def days_to_birthday(self):
-        if self.birthday.value:
-            today = datetime.now().date()
-            next_birthday = datetime(today.year, self.birthday.value.month, self.birthday.value.day).date()
-            if today > next_birthday:
-                next_birthday = datetime(today.year + 1, self.birthday.value.month, self.birthday.value.day).date()
-            return (next_birthday - today).days
-        return None
+        return self.birthday.days_to_birthday()
+
+    def __getstate__(self):
+        # The owning book re-attaches itself on load; don't pickle it along.
+        return {'name': self._name, 'phones': self._phones, 'birthday': self._birthday}
+
+    def __setstate__(self, state):
+        state = _slot_state(state)
+        self.book = None
+        phones = state.get('phones', state.get('_phones'))
+        if isinstance(phones, list):
+            phones = {phone.value: phone for phone in phones}
+        self._phones = phones
+        self.name = state.get('name', state.get('_name'))
+        self.birthday = state.get('birthday', state.get('_birthday'))
 
     def __str__(self):
-        return f"Contact name: {self.name.value}, phones: {'; '.join(str(p) for p in self.phones)}, birthday: {self.birthday.value}"
+        return f"Contact name: {self.name.value}, phones: {'; '.join(self._phones)}, birthday: {self.birthday.value}"
+
+
+def _build_buffer(keys):
+    """Join keys into one newline-separated string and remember where each starts."""
+    starts = []
+    offset = 0
+    for key in keys:
+        starts.append(offset)
+        offset += len(key) + 1
+    return keys, '\n'.join(keys), starts
+
+
+def _sweep(keys_buffer, needle):
+    """Yield the keys containing needle using str.find over the joined buffer."""
+    keys, buffer, starts = keys_buffer
+    if not keys:
+        return
+    pos = buffer.find(needle)
+    while pos != -1:
+        i = bisect_right(starts, pos) - 1
+        if pos + len(needle) <= starts[i] + len(keys[i]):
+            yield keys[i]
+            if i + 1 == len(keys):
+                break
+            pos = buffer.find(needle, starts[i + 1])
+        else:
+            pos = buffer.find(needle, pos + 1)
 
 
 class AddressBook(UserDict):
     def __init__(self, filename='address_book.pkl'):
         self.filename = filename
-        self.load()
+        self._name_index = {}
+        self._phone_index = {}
+        self._invalidate()
+        self._loaded = False
+        self.data = {}
+
+    @property
+    def data(self):
+        self._ensure_loaded()
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+
+    def _invalidate(self):
+        # Search buffers and birthday columns are rebuilt on next use.
+        self._buffers = None
+        self._birthdays = None
+
+    def _ensure_loaded(self):
+        # Records added before the first read are kept on top of the file's.
+        if not self._loaded:
+            pending = list(self._data.values())
+            self.load()
+            for record in pending:
+                self.add_record(record)
 
     def load(self):
         try:
+            with gzip.open(self.filename, 'rb') as f:
+                payload = pickle.load(f)
+        except gzip.BadGzipFile:
+            # Files saved before compression was added.
             with open(self.filename, 'rb') as f:
-                self.data = pickle.load(f)
+                payload = pickle.load(f)
         except FileNotFoundError:
-            self.data = {}
+            payload = {}
+        if isinstance(payload, dict):
+            # Older files pickled the records dict itself.
+            self.data = payload
+        else:
+            records = [Record._trusted(*columns) for columns in zip(*payload)]
+            self.data = {record.name.value: record for record in records}
+        self._loaded = True
+        self._reindex()
+
+    def _reindex(self):
+        self._name_index = {}
+        self._phone_index = {}
+        self._invalidate()
+        for record in self.data.values():
+            self._index_record(record)
+
+    def _index_record(self, record):
+        record.book = self
+        self._name_index.setdefault(record._name_lc, []).append(record)
+        for phone in record._phones:
+            self._index_phone(phone, record)
+        self._invalidate()
+
+    def _unindex_record(self, record):
+        records = self._name_index.get(record._name_lc, [])
+        if record in records:
+            records.remove(record)
+            if not records:
+                del self._name_index[record._name_lc]
+        for phone in record._phones:
+            self._unindex_phone(phone, record)
+        record.book = None
+        self._invalidate()
+
+    def _index_phone(self, phone, record):
+        records = self._phone_index.setdefault(phone, [])
+        if record not in records:
+            records.append(record)
+            self._buffers = None
+
+    def _unindex_phone(self, phone, record):
+        records = self._phone_index.get(phone, [])
+        if record in records:
+            records.remove(record)
+            if not records:
+                del self._phone_index[phone]
+            self._buffers = None
 
     def save(self):
-        with open(self.filename, 'wb') as f:
-            pickle.dump(self.data, f)
+        self._ensure_loaded()
+        records = self.data.values()
+        payload = (
+            [record.name.value for record in records],
+            [list(record._phones) for record in records],
+            [record.birthday.isoformat() for record in records],
+        )
+        with gzip.open(self.filename, 'wb', compresslevel=3) as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _detach(self, record):
+        key = record.name.value
+        if self.data.get(key) is record:
+            del self[key]
+        else:
+            self._unindex_record(record)
 
     def add_record(self, record):
-        self.data[record.name.value] = record
+        self[record.name.value] = record
 
     def delete(self, name):
-        if name in self.data:
-            del self.data[name]
+        self._ensure_loaded()
+        record = self.data.pop(name, None)
+        if record is not None:
+            self._unindex_record(record)
 
     def search(self, query):
-        found_records = []
-        for record in self.values():
-            if query.lower() in record.name.value.lower():
-                found_records.append(record)
-            for phone in record.phones:
-                if query in phone.value:
-                    found_records.append(record)
-                    break
-        return found_records
+        self._ensure_loaded()
+        if self._buffers is None:
+            self._buffers = (_build_buffer(list(self._name_index)), _build_buffer(list(self._phone_index)))
+        names, phones = self._buffers
+        found_records = {}
+        for name in _sweep(names, query.lower()):
+            for record in self._name_index[name]:
+                found_records[id(record)] = record
+        if query in self._phone_index:
+            matched_phones = [query]
+        else:
+            matched_phones = _sweep(phones, query)
+        for phone in matched_phones:
+            for record in self._phone_index[phone]:
+                found_records[id(record)] = record
+        if len(found_records) > 1:
+            # Keep book order, which delete_record_handler numbers its menu by.
+            return [record for record in self.data.values() if id(record) in found_records]
+        return list(found_records.values())
 
     def find(self, name):
+        self._ensure_loaded()
         return self.data.get(name, None)
 
+    def iterator(self, n):
+        self._ensure_loaded()
+        records = iter(self.data.values())
+        while chunk := list(itertools.islice(records, n)):
+            yield chunk
+
+    def upcoming_birthdays(self, window_days):
+        self._ensure_loaded()
+        if self._birthdays is None:
+            records = [record for record in self.data.values() if record.birthday.value is not None]
+            months = days = None
+            np = _numpy()
+            if np is not None:
+                months = np.array([record.birthday.value.month for record in records], dtype=np.int8)
+                days = np.array([record.birthday.value.day for record in records], dtype=np.int8)
+            self._birthdays = records, months, days
+        records, months, days = self._birthdays
+        today_ord = date.today().toordinal()
+        if months is None:
+            return [
+                record for record in records
+                if _days_until(today_ord, record.birthday.value.month, record.birthday.value.day) < window_days
+            ]
+        countdown = _days_until_batch(months, days, today_ord)
+        return [records[i] for i in (countdown < window_days).nonzero()[0]]
+
+    def __setitem__(self, key, record):
+        # Writes before the first load stay pending in _data; see _ensure_loaded.
+        old_record = self._data.get(key)
+        if old_record is not None:
+            self._unindex_record(old_record)
+        self._data[key] = record
+        self._index_record(record)
+
+    def __delitem__(self, key):
+        self._unindex_record(self.data.pop(key))
+
+    def copy(self):
+        # A record points back at the one book indexing it, so the copy gets its own records.
+        book = type(self)(self.filename)
+        book._loaded = True
+        for key, record in self.data.items():
+            book[key] = deepcopy(record)
+        return book
+
+    __copy__ = copy
+
     def __enter__(self):
-        self.load()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -137,7 +498,7 @@ def add_record_handler(address_book):
     name = input("Enter the contact's name: ")
     birthday_input = input("Enter the contact's birthday (YYYY-MM-DD), leave blank if unknown: ")
     try:
-        birthday = datetime.strptime(birthday_input, "%Y-%m-%d").date()
+        birthday = date.fromisoformat(birthday_input)
     except ValueError:
         birthday = None
     record = Record(name, birthday)
@@ -167,7 +528,7 @@ def delete_record_handler(address_book):
     try:
         index = int(choice) - 1
         if 0 <= index < len(found_records):
-            address_book.delete_record(found_records[index])
+            address_book.delete(found_records[index].name.value)
             print("Contact deleted successfully.")
         else:
             print("Invalid choice.")
@@ -0,0 +1,336 @@
+import gzip
+import os
+import pickle
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+import main
+
+
+def make_record(name, *phones, birthday=None):
+    record = main.Record(name, birthday)
+    for phone in phones:
+        record.add_phone(phone)
+    return record
+
+
+def names(records):
+    return [record.name.value for record in records]
+
+
+class FakeDate(date):
+    today_value = None
+
+    @classmethod
+    def today(cls):
+        return cls.today_value
+
+
+class BookTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, 'book.pkl')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+
+class TestPhone(unittest.TestCase):
+    def test_rejects_invalid_numbers(self):
+        for value in ['123456789', '12345678901', '12345abcde', '123456789\n', '', None, 1234567890]:
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                main.Phone(value)
+
+    def test_accepts_ten_digits(self):
+        self.assertEqual(main.Phone('0504567890').value, '0504567890')
+
+
+class TestImmutableFields(unittest.TestCase):
+    def test_fields_reject_assignment(self):
+        for field in [main.Name('Ann'), main.Phone('0504567890'), main.Birthday('2000-01-01')]:
+            with self.subTest(field=type(field).__name__):
+                old_value = field.value
+                with self.assertRaises(AttributeError):
+                    field.value = 'changed'
+                with self.assertRaises(AttributeError):
+                    del field.value
+                self.assertEqual(field.value, old_value)
+
+    def test_birthday_from_iso_string(self):
+        self.assertEqual(main.Birthday('2000-02-29').value, date(2000, 2, 29))
+        for value in ['2001-02-29', '2000-13-01', 'soon']:
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                main.Birthday(value)
+
+    def test_fields_survive_pickling(self):
+        phone = pickle.loads(pickle.dumps(main.Phone('0504567890')))
+        birthday = pickle.loads(pickle.dumps(main.Birthday('2000-01-01')))
+        self.assertEqual(phone.value, '0504567890')
+        self.assertEqual(birthday.value, date(2000, 1, 1))
+
+
+class TestRecord(unittest.TestCase):
+    def setUp(self):
+        self.record = make_record('John', '1234567890', '5555555555')
+
+    def test_edit_phone_with_invalid_number_keeps_old(self):
+        with self.assertRaises(ValueError):
+            self.record.edit_phone('1234567890', 'bad')
+        self.assertEqual(list(self.record.phones), ['1234567890', '5555555555'])
+
+    def test_edit_missing_phone(self):
+        with self.assertRaises(ValueError):
+            self.record.edit_phone('1111111111', '4444444444')
+        self.assertEqual(list(self.record.phones), ['1234567890', '5555555555'])
+
+    def test_phone_methods_accept_phone_objects(self):
+        self.assertEqual(self.record.find_phone(main.Phone('1234567890')).value, '1234567890')
+        self.record.edit_phone(main.Phone('1234567890'), '4444444444')
+        self.record.remove_phone(main.Phone('5555555555'))
+        self.assertEqual(list(self.record.phones), ['4444444444'])
+
+    def test_lowercased_name(self):
+        record = main.Record('Mary Jo')
+        self.assertEqual(record._name_lc, 'mary jo')
+        self.assertEqual(pickle.loads(pickle.dumps(record))._name_lc, 'mary jo')
+        record.name = 'ZOE'
+        self.assertEqual(record._name_lc, 'zoe')
+
+    def test_lowercased_name_from_legacy_state(self):
+        record = main.Record.__new__(main.Record)
+        record.__setstate__({'name': main.Name('Old Timer'), 'phones': [main.Phone('1234567890')], 'birthday': main.Birthday()})
+        self.assertEqual(record._name_lc, 'old timer')
+        self.assertEqual(list(record.phones), ['1234567890'])
+
+
+class TestSearch(BookTestCase):
+    def setUp(self):
+        super().setUp()
+        book = main.AddressBook(self.filename)
+        book.add_record(make_record('Zed', '0123456789'))
+        book.add_record(make_record('Mary Jo', '5550001111'))
+        book.save()
+        # Start from a loaded book so later writes have to update a live index.
+        self.book = main.AddressBook(self.filename)
+        self.book.load()
+
+    def test_empty_query_on_empty_book(self):
+        self.assertEqual(main.AddressBook(self.filename + '.new').search(''), [])
+
+    def test_empty_query_without_phones(self):
+        book = main.AddressBook(self.filename + '.new')
+        book.add_record(main.Record('Bob'))
+        self.assertEqual(names(book.search('')), ['Bob'])
+
+    def test_empty_query_returns_everyone(self):
+        self.assertEqual(names(self.book.search('')), ['Zed', 'Mary Jo'])
+
+    def test_no_match(self):
+        self.assertEqual(self.book.search('nobody'), [])
+
+    def test_name_and_phone_match(self):
+        self.assertEqual(names(self.book.search('jo')), ['Mary Jo'])
+        self.assertEqual(names(self.book.search('0123')), ['Zed'])
+        self.assertEqual(names(self.book.search('5550001111')), ['Mary Jo'])
+
+    def test_results_in_book_order(self):
+        self.book.add_record(make_record('Alpha', '1200000000'))
+        self.book.add_record(main.Record('x12'))
+        self.assertEqual(names(self.book.search('12')), ['Zed', 'Alpha', 'x12'])
+
+    def test_after_delete(self):
+        self.book.delete('Zed')
+        self.assertEqual(self.book.search('zed'), [])
+        self.assertEqual(self.book.search('0123'), [])
+
+    def test_after_delitem(self):
+        del self.book['Zed']
+        self.assertEqual(self.book.search('zed'), [])
+        self.assertEqual(self.book.search('0123'), [])
+
+    def test_after_setitem(self):
+        self.book['Ann'] = main.Record('Ann')
+        self.assertEqual(names(self.book.search('ann')), ['Ann'])
+        self.book.delete('Ann')
+        self.assertEqual(self.book.search('ann'), [])
+
+    def test_after_phone_edit(self):
+        record = self.book.find('Zed')
+        record.edit_phone('0123456789', '9876543210')
+        self.assertEqual(self.book.search('0123'), [])
+        self.assertEqual(names(self.book.search('9876')), ['Zed'])
+
+    def test_after_rename(self):
+        record = self.book.find('Zed')
+        record.name = 'Zoe'
+        self.assertEqual(names(self.book.search('zoe')), ['Zoe'])
+        self.assertEqual(self.book.search('zed'), [])
+        self.assertIsNone(self.book.find('Zed'))
+        self.assertIs(self.book.find('Zoe'), record)
+        with self.assertRaises(AttributeError):
+            record.name.value = 'Zed'
+
+    def test_rename_before_load(self):
+        book = main.AddressBook(self.filename)
+        record = main.Record('Ann')
+        book.add_record(record)
+        record.name = 'Bea'
+        self.assertEqual(sorted(book), ['Bea', 'Mary Jo', 'Zed'])
+        self.assertEqual(names(book.search('bea')), ['Bea'])
+
+    def test_phones_are_read_only(self):
+        record = self.book.find('Zed')
+        with self.assertRaises(TypeError):
+            record.phones['1111111111'] = main.Phone('1111111111')
+        record.add_phone('4444444444')
+        self.assertEqual(names(self.book.search('4444')), ['Zed'])
+
+
+class TestPersistence(BookTestCase):
+    def test_legacy_plain_pickle(self):
+        with open(self.filename, 'wb') as f:
+            pickle.dump({'Old': make_record('Old', '1234567890', birthday=date(1990, 5, 1))}, f)
+        book = main.AddressBook(self.filename)
+        self.assertEqual(book.find('Old').find_phone('1234567890').value, '1234567890')
+        self.assertEqual(names(book.search('123')), ['Old'])
+
+        book.save()
+        with open(self.filename, 'rb') as f:
+            self.assertEqual(f.read(2), b'\x1f\x8b')
+        record = main.AddressBook(self.filename).find('Old')
+        self.assertEqual(str(record), 'Contact name: Old, phones: 1234567890, birthday: 1990-05-01')
+
+    def test_gzip_columnar_round_trip(self):
+        book = main.AddressBook(self.filename)
+        book.add_record(make_record('Ann', '1112223334', '5556667778', birthday=date(2000, 2, 29)))
+        book.add_record(main.Record('Bob'))
+        book.save()
+        with gzip.open(self.filename, 'rb') as f:
+            self.assertEqual(pickle.load(f), (
+                ['Ann', 'Bob'],
+                [['1112223334', '5556667778'], []],
+                ['2000-02-29', None],
+            ))
+        loaded = main.AddressBook(self.filename)
+        self.assertEqual(sorted(loaded), ['Ann', 'Bob'])
+        self.assertEqual(list(loaded['Ann'].phones), ['1112223334', '5556667778'])
+        self.assertEqual(loaded['Ann'].birthday.value, date(2000, 2, 29))
+        self.assertIsNone(loaded['Bob'].birthday.value)
+
+    def test_add_before_load_keeps_file_records(self):
+        book = main.AddressBook(self.filename)
+        book.add_record(make_record('Ann', '1112223334'))
+        book.save()
+
+        book = main.AddressBook(self.filename)
+        book.add_record(main.Record('Bob'))
+        self.assertFalse(book._loaded)
+        book.save()
+
+        self.assertEqual(sorted(main.AddressBook(self.filename)), ['Ann', 'Bob'])
+
+    def test_data_and_repr_load_the_file(self):
+        book = main.AddressBook(self.filename)
+        book.add_record(main.Record('Ann'))
+        book.save()
+        self.assertEqual(list(main.AddressBook(self.filename).data), ['Ann'])
+        self.assertIn("'Ann'", repr(main.AddressBook(self.filename)))
+
+    def test_copy_has_its_own_index(self):
+        book = main.AddressBook(self.filename)
+        book.add_record(make_record('Ann', '1112223334'))
+        copied = book.copy()
+        self.assertIsNot(copied._name_index, book._name_index)
+        self.assertIs(book.find('Ann').book, book)
+        copied.delete('Ann')
+        self.assertEqual(names(book.search('ann')), ['Ann'])
+        self.assertEqual(copied.search('111'), [])
+
+    def test_context_manager_saves(self):
+        with main.AddressBook(self.filename) as book:
+            book.add_record(main.Record('Ann'))
+        self.assertIsNotNone(main.AddressBook(self.filename).find('Ann'))
+
+
+class TestHandlers(BookTestCase):
+    def add_contact(self, birthday_input):
+        book = main.AddressBook(self.filename)
+        answers = ['Ann', birthday_input, '1112223334', 'no']
+        with mock.patch('builtins.input', side_effect=answers), mock.patch('builtins.print'):
+            main.add_record_handler(book)
+        return book.find('Ann')
+
+    def test_add_record_handler_parses_iso_birthday(self):
+        self.assertEqual(self.add_contact('2000-02-29').birthday.value, date(2000, 2, 29))
+
+    def test_add_record_handler_ignores_bad_birthday(self):
+        for birthday_input in ['', '29.02.2000', '2001-02-29']:
+            with self.subTest(birthday_input=birthday_input):
+                self.assertIsNone(self.add_contact(birthday_input).birthday.value)
+
+
+class TestIterator(BookTestCase):
+    def test_chunks(self):
+        book = main.AddressBook(self.filename)
+        for i in range(5):
+            book.add_record(main.Record(str(i)))
+        self.assertEqual([names(chunk) for chunk in book.iterator(2)], [['0', '1'], ['2', '3'], ['4']])
+
+    def test_empty_book(self):
+        self.assertEqual(list(main.AddressBook(self.filename).iterator(3)), [])
+
+
+class TestUpcomingBirthdays(BookTestCase):
+    def setUp(self):
+        super().setUp()
+        self.book = main.AddressBook(self.filename)
+        self.book.add_record(main.Record('Leap', date(2000, 2, 29)))
+        self.book.add_record(main.Record('March', date(1990, 3, 2)))
+        self.book.add_record(main.Record('Winter', date(1985, 12, 31)))
+        self.book.add_record(main.Record('Unknown'))
+
+    def test_birthday_change_after_query(self):
+        record = self.book.find('Unknown')
+        self.assertEqual(self.upcoming(date(2024, 6, 1), 3), [])
+        record.birthday = main.Birthday('1999-06-02')
+        self.assertEqual(self.upcoming_cached(date(2024, 6, 1), 3), ['Unknown'])
+        record.birthday = date(1999, 6, 10)
+        self.assertEqual(self.upcoming_cached(date(2024, 6, 1), 3), [])
+
+    def upcoming(self, today, window_days):
+        self.book._birthdays = None
+        return self.upcoming_cached(today, window_days)
+
+    def upcoming_cached(self, today, window_days):
+        FakeDate.today_value = FakeDate(today.year, today.month, today.day)
+        with mock.patch.object(main, 'date', FakeDate):
+            return names(self.book.upcoming_birthdays(window_days))
+
+    def check(self):
+        # Feb 29 is celebrated on Mar 1 outside leap years.
+        self.assertEqual(self.upcoming(date(2023, 2, 28), 1), [])
+        self.assertEqual(self.upcoming(date(2023, 2, 28), 2), ['Leap'])
+        self.assertEqual(self.upcoming(date(2023, 3, 1), 1), ['Leap'])
+        self.assertEqual(self.upcoming(date(2024, 2, 28), 2), ['Leap'])
+        self.assertEqual(self.upcoming(date(2024, 3, 1), 2), ['March'])
+        self.assertEqual(self.upcoming(date(2024, 12, 31), 61), ['Leap', 'Winter'])
+        self.assertEqual(self.upcoming(date(2024, 1, 1), 366), ['Leap', 'March', 'Winter'])
+
+    def test_pure_python(self):
+        with mock.patch.object(main, '_numpy', lambda: None):
+            self.check()
+
+    @unittest.skipIf(main._numpy() is None, 'numpy is not installed')
+    def test_numpy(self):
+        with mock.patch.object(main, '_birthday_kernel', lambda: None):
+            self.check()
+
+    @unittest.skipIf(main._numpy() is None or main._birthday_kernel() is None, 'numba is not installed')
+    def test_numba(self):
+        self.check()
+
+
+if __name__ == '__main__':
+    unittest.main()